@@ -63,6 +63,9 @@ PLOT_DIR = "plots/"
 def MEASUREMENT_FILE(measurement_id: int, ext: str="json") -> str:
     """Return the file path for a specific measurement."""
     return f"{DATA_DIR}measurement_{measurement_id}.{ext}"
+def MEASUREMENT_INFO_FILE(measurement_id: int) -> str:
+    """Return the file path for the cached measurement information."""
+    return f"{DATA_DIR}measurement_{measurement_id}_info.json"
 def PROBES_HISTORY_FILE(probes: Probes, ext: str="json") -> str:
     """Return the file path for the probes history."""
     if len(probes) == 1:
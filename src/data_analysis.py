@@ -26,36 +26,27 @@ def probe_connection_analysis(probe_history: pd.DataFrame, start_time: int, end_
     pd.DataFrame
         A DataFrame summarizing probe availability statistics.
     """
-    columns = ['probe_id', 'starlink', 'other', 'disconnected']
-    data = []
-    for probe_id in probe_history['probe_id'].unique():
-        probe_data = probe_history[probe_history['probe_id'] == probe_id]
-        probe_data = probe_data.sort_values(by='since')
-        # filter data within the specified time range
-        probe_data['until'] = probe_data['since'].shift(-1, fill_value=end_time)
-        probe_data = probe_data[(probe_data['since'] < end_time) & (probe_data['until'] > start_time)]
-        # adjust start and end times
-        probe_data['since'] = probe_data['since'].clip(lower=start_time)
-        probe_data['until'] = probe_data['until'].clip(upper=end_time)
-        
-        disconnected_time = 0
-        starlink_time = 0
-        other_time = 0
-        for _, row in probe_data.iterrows():
-            if row['status'] == 'Connected':
-                if row['asn'] == STARLINK_ASN:
-                    starlink_time += (row['until'] - row['since'])
-                else:
-                    other_time += (row['until'] - row['since'])
-            elif row['status'] == 'Disconnected':
-                disconnected_time += (row['until'] - row['since'])
-        
-        data.append([probe_id, starlink_time, other_time, disconnected_time])
-        
-    df = pd.DataFrame(data, columns=columns)
-    df['starlink'] = df['starlink'].apply(lambda x: x / (end_time - start_time))
-    df['other'] = df['other'].apply(lambda x: x / (end_time - start_time))
-    df['disconnected'] = df['disconnected'].apply(lambda x: x / (end_time - start_time))
+    df = probe_history.sort_values(by=['probe_id', 'since'])
+    # each status period lasts until the next one starts (or the end of the analysis period)
+    df['until'] = df.groupby('probe_id')['since'].shift(-1).fillna(end_time).astype(int)
+    # filter data within the specified time range
+    df = df[(df['since'] < end_time) & (df['until'] > start_time)]
+    # adjust start and end times
+    df['since'] = df['since'].clip(lower=start_time)
+    df['until'] = df['until'].clip(upper=end_time)
+
+    # split each period duration into the 3 categories
+    duration = df['until'] - df['since']
+    connected = df['status'] == 'Connected'
+    df['starlink'] = duration.where(connected & (df['asn'] == STARLINK_ASN), 0)
+    df['other'] = duration.where(connected & (df['asn'] != STARLINK_ASN), 0)
+    df['disconnected'] = duration.where(df['status'] == 'Disconnected', 0)
+
+    df = df.groupby('probe_id', sort=False)[['starlink', 'other', 'disconnected']].sum()
+    # keep probes without any period in the time range (all times at 0)
+    df = df.reindex(probe_history['probe_id'].unique(), fill_value=0).reset_index()
+    # multiply by the precomputed inverse rather than dividing each column
+    df[['starlink', 'other', 'disconnected']] *= 1.0 / (end_time - start_time)
     
     if save:
         name = PROBE_CONNECTION_FILE(PROBES)
@@ -78,12 +69,12 @@ def probe_pop_ip_analysis(probe_history: pd.DataFrame, save=False) -> pd.DataFra
     pd.DataFrame
         A DataFrame summarizing the PoP IP addresses used by each probe.
     """
-    probe_pop_ips = probe_history[probe_history['status'] == 'Connected'] # Filter only connected probes
-    probe_pop_ips = probe_pop_ips[probe_pop_ips['asn'] == STARLINK_ASN] # Filter only Starlink probes
-    probe_pop_ips = probe_pop_ips.drop_duplicates(subset=['probe_id', 'ip_address']) # Keep only unique probe_id and ip_address pairs
-    
-    probe_pop_ips = probe_pop_ips.groupby('probe_id')['ip_address'].apply(lambda x: ','.join(x)).reset_index()
-    probe_pop_ips.columns = ['probe_id', 'pop_ips']
+    # Keep only unique (probe_id, ip_address) pairs of probes connected to Starlink
+    mask = (probe_history['status'] == 'Connected') & (probe_history['asn'] == STARLINK_ASN)
+    probe_pop_ips = probe_history.loc[mask, ['probe_id', 'ip_address']].drop_duplicates()
+
+    probe_pop_ips = probe_pop_ips.groupby('probe_id', sort=False)['ip_address'] \
+                                 .agg(','.join).reset_index(name='pop_ips')
     
     if save:
         # Suppress "" for better readability (one ip per line) 
@@ -107,14 +98,12 @@ def segment_analysis(measurement_df: pd.DataFrame, save=False) -> pd.DataFrame:
     pd.DataFrame
         A DataFrame summarizing the segment analysis.
     """
-    df = measurement_df.copy()
+    latencies = ['user_latency', 'bent_pipe_latency', 'ground_latency']
     # Convert latencies to numeric and filter out non-numeric values
-    df['user_latency'] = pd.to_numeric(df['user_latency'], errors='coerce')
-    df['bent_pipe_latency'] = pd.to_numeric(df['bent_pipe_latency'], errors='coerce')
-    df['ground_latency'] = pd.to_numeric(df['ground_latency'], errors='coerce')
-    df = df.dropna(subset=['user_latency', 'bent_pipe_latency', 'ground_latency'])
+    df = measurement_df.assign(**{c: pd.to_numeric(measurement_df[c], errors='coerce') for c in latencies})
+    df = df.dropna(subset=latencies)
 
-    segment_df = df.groupby(['continent', 'country']).agg({
+    segment_df = df.groupby(['continent', 'country'], observed=True).agg({
         'user_latency': 'mean',
         'bent_pipe_latency': 'mean',
         'ground_latency': 'mean'
@@ -155,23 +144,17 @@ def bent_pipe_analysis(measurement_df: pd.DataFrame) -> pd.DataFrame:
     pd.DataFrame
         A DataFrame summarizing the bent pipe analysis.
     """
-    df = measurement_df.copy()
-    
-    # Filtering
-    n = df.shape[0]
-    # Convert latencies to numeric and filter out non-numeric values
-    df['user_latency'] = pd.to_numeric(df['user_latency'], errors='coerce')
-    df['bent_pipe_latency'] = pd.to_numeric(df['bent_pipe_latency'], errors='coerce')
-    df['ground_latency'] = pd.to_numeric(df['ground_latency'], errors='coerce')
-    df = df.dropna(subset=['user_latency', 'bent_pipe_latency', 'ground_latency'])
-    
-    # Convert timestamp to datetime
-    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
-    
+    # only the bent pipe latency is returned, so coerce and filter on it alone
+    # (error rows hold NaN; coercion also covers older caches storing strings)
+    bent_pipe = pd.to_numeric(measurement_df['bent_pipe_latency'], errors='coerce')
+    mask = bent_pipe.notna()
+
+    df = measurement_df.loc[mask, ['continent', 'country', 'probe_id']].assign(
+        timestamp=pd.to_datetime(measurement_df.loc[mask, 'timestamp'], unit='s'),
+        bent_pipe_latency=bent_pipe[mask])
+
     df.reset_index(drop=True, inplace=True)
-    
-    df = df[['continent', 'country', 'probe_id', 'timestamp', 'bent_pipe_latency']]
-    
+
     return df.astype({
         'continent': str,
         'country': str,
@@ -1,8 +1,19 @@
 #!/bin/python3
+import json
 import requests
 from datetime import datetime
+from functools import lru_cache
+from os.path import isfile
+from requests.adapters import HTTPAdapter, Retry
 from config import *
 
+# Shared session: reuses TCP/TLS connections across API calls, asks for
+# compressed responses and retries transient failures
+_SESSION = requests.Session()
+_SESSION.headers.update({'Accept-Encoding': 'gzip'})
+_SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                       max_retries=Retry(total=3, backoff_factor=0.3)))
+
 def unix_time_to_iso8601(unix_time: int) -> str:
     """
     Convert Unix timestamp to ISO 8601 format.
@@ -20,25 +31,36 @@ def unix_time_to_iso8601(unix_time: int) -> str:
     return datetime.fromtimestamp(unix_time).isoformat() + 'Z'
 
 
+@lru_cache(maxsize=None)
 def get_measurement_info(measurement_id: int) -> dict:
     """
     Fetch measurement information from Ripe Atlas API.
-    
+    The information is cached in memory and on disk, so the API is only
+    queried once per measurement across runs.
+
     Parameters
     ----------
     measurement_id : int
         The ID of the measurement to fetch.
-    
+
     Returns
     -------
     dict
         A dictionary containing measurement information.
     """
+    cache_file = MEASUREMENT_INFO_FILE(measurement_id)
+    if isfile(cache_file):
+        with open(cache_file, "r") as file:
+            return json.load(file)
+
     url = f"https://atlas.ripe.net/api/v2/measurements/{measurement_id}/"
-    response = requests.get(url)
-    
+    response = _SESSION.get(url)
+
     if response.status_code == 200:
-        return response.json()
+        info = response.json()
+        with open(cache_file, "w") as file:
+            json.dump(info, file)
+        return info
     else:
         raise Exception(f"Failed to fetch measurement info. Status code: {response.status_code}")
 
@@ -84,14 +106,15 @@ def download_measurement(measurement_id: int) -> None:
     end_time = measurement_info['stop_time']
     
     url = f"https://atlas.ripe.net/api/v2/measurements/{measurement_id}/results/?start={start_time}&stop={end_time}&format=txt"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        with open(MEASUREMENT_FILE(measurement_id), "w") as file:
-            file.write(response.text)
-        print(f"Measurement {measurement_id} downloaded successfully.")
-    else:
-        print(f"Failed to download measurement {measurement_id}. Status code: {response.status_code}")
+    with _SESSION.get(url, stream=True) as response:
+        if response.status_code == 200:
+            # stream to disk so the (potentially huge) payload never sits in memory
+            with open(MEASUREMENT_FILE(measurement_id), "wb") as file:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    file.write(chunk)
+            print(f"Measurement {measurement_id} downloaded successfully.")
+        else:
+            print(f"Failed to download measurement {measurement_id}. Status code: {response.status_code}")
 
 
 def download_probes_history(probes: Probes, start_time: int, end_time: int) -> None:
@@ -116,7 +139,7 @@ def download_probes_history(probes: Probes, start_time: int, end_time: int) -> N
         "format": "txt"
     }
     
-    response = requests.get(url, params=params)
+    response = _SESSION.get(url, params=params)
     
     if response.status_code == 200:
         with open(PROBES_HISTORY_FILE(probes), "w") as file:
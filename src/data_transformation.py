@@ -1,13 +1,187 @@
 #!/bin/python3
 import json
+import mmap
+from math import nan
 import pandas as pd
-from os.path import isfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import itemgetter
+from os import cpu_count
+from os.path import getmtime, getsize, isfile
+
+try:
+    # pysimdjson tokenizes with SIMD instructions and only materializes the
+    # fields that are actually accessed; one parser is reused for every line
+    import simdjson
+    _PARSER = simdjson.Parser()
+    json_loads = _PARSER.parse
+except ImportError:
+    try:
+        # orjson parses each line several times faster than the stdlib parser
+        from orjson import loads as json_loads
+    except ImportError:
+        json_loads = json.loads
 from config import *
 from data_retrieving import *
 
-def json_data_extraction(file_path: str, 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+except ImportError:
+    pa = None
+
+# Probe metadata as a frame indexed by probe id, so both the country and
+# continent columns attach to the measurement with a single hash join
+PROBES_DF = pd.DataFrame.from_dict(PROBES, orient='index', columns=['country', 'continent'])
+
+def _write_csv(df: pd.DataFrame, name: str) -> None:
+    """Write a DataFrame to CSV, with pyarrow's C++ writer when available."""
+    if pa is not None:
+        pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), name)
+    else:
+        df.to_csv(name, index=False)
+
+# Minimum JSON file size (bytes) before parsing is spread over a process
+# pool; smaller files are parsed in-process to avoid pool startup overhead
+PARALLEL_MIN_FILE_SIZE = 8 << 20
+
+def _make_accessor(field: str|list):
+    """Build a function extracting the given (possibly nested) field from a record."""
+    if isinstance(field, list):
+        def access(record, path=tuple(field)):
+            value = record
+            for subfield in path:
+                value = value[subfield]
+            return value
+    else:
+        def access(record, field=field):
+            return record[field]
+    return access
+
+def _flatten_columns(columns: list[str|list[str]]) -> list[str]:
+    """Flatten a columns specification into the list of output column names."""
+    names = []
+    for column in columns:
+        if isinstance(column, list):
+            names.extend(column)
+        else:
+            names.append(column)
+    return names
+
+def _chunk_offsets(file_path: str, chunks: int) -> list[tuple[int, int]]:
+    """
+    Split a file into newline-aligned byte ranges of roughly equal size.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the file to split.
+    chunks : int
+        The number of ranges to aim for.
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        The non-empty (start, end) byte ranges covering the whole file.
+    """
+    size = getsize(file_path)
+    bounds = [0]
+    with open(file_path, "rb") as file:
+        for i in range(1, chunks):
+            file.seek(size * i // chunks)
+            file.readline() # advance to the start of the next line
+            bounds.append(min(file.tell(), size))
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+def _parse_chunk(file_path: str, start: int, end: int,
+                 columns: list[str|list[str]], fields: list[str], maps: dict|None,
+                 line_filters: dict|None) -> tuple[dict, int|None]:
+    """
+    Parse the [start, end) byte range of a JSON file into per-column lists.
+    Runs in worker processes: each worker memory-maps the file itself, so
+    only the byte offsets travel between processes, never the data.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the JSON file.
+    start, end : int
+        Newline-aligned byte range to parse.
+    columns, fields, maps, line_filters
+        Same as for json_data_extraction.
+
+    Returns
+    -------
+    tuple[dict, int|None]
+        Same as _parse_lines.
+    """
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            lines = mm[start:end].splitlines()
+    return _parse_lines(lines, columns, fields, maps, line_filters)
+
+def _parse_lines(lines: list[bytes],
+                 columns: list[str|list[str]], fields: list[str], maps: dict|None,
+                 line_filters: dict|None=None) -> tuple[dict, int|None]:
+    """
+    Parse a batch of JSON lines into per-column value lists.
+    Runs in worker processes when the extraction is parallelized, so it
+    rebuilds its field accessors locally instead of receiving closures.
+
+    Parameters
+    ----------
+    lines : list[bytes]
+        The raw JSON lines to parse.
+    columns, fields, maps, line_filters
+        Same as for json_data_extraction.
+
+    Returns
+    -------
+    tuple[dict, int|None]
+        The per-column value lists, and the value of the 'count' sentinel
+        record if the batch contained one (None otherwise).
+    """
+    # resolve field access, map functions, column fan-out and line filters
+    # once instead of once per record
+    extractors = [(column, _make_accessor(field), maps.get(str(field)) if maps else None,
+                   isinstance(column, list),
+                   line_filters.get(str(field)) if line_filters else None)
+                  for column, field in zip(columns, fields)]
+
+    # build column-wise to spare pandas the row-to-column transposition
+    cols = {name: [] for name in _flatten_columns(columns)}
+    expected_count = None
+    for line in lines:
+        record = json_loads(line)
+        if 'count' in record:
+            expected_count = record['count']
+        else:
+            for column, access, map_fn, multi, line_filter in extractors:
+                if line_filter is not None and \
+                        not any(needle in line for needle in line_filter[0]):
+                    # C-speed substring tests on the raw bytes: the record
+                    # cannot contain any needle, skip extraction entirely
+                    value = line_filter[1]
+                else:
+                    value = access(record)
+                    if map_fn is not None:
+                        value = map_fn(value)
+                if multi:
+                    # one field spread over several output columns
+                    for name, item in zip(column, value):
+                        cols[name].append(item)
+                else:
+                    cols[column].append(value)
+        # release the record before the next parse: a reused simdjson parser
+        # requires that no object referencing its buffer is still alive
+        del record
+    return cols, expected_count
+
+def json_data_extraction(file_path: str,
                  columns: list[str], fields: list[str], maps: dict|None=None,
-                 save: bool=False) -> pd.DataFrame:
+                 line_filters: dict|None=None,
+                 sort: bool=True, save: bool=False) -> pd.DataFrame:
     """
     Extract data from JSON file into a DataFrame.
     
@@ -15,8 +189,10 @@ def json_data_extraction(file_path: str,
     ----------
     file_path : str
         Path to the JSON file.
-    columns : list[str]
+    columns : list[str|list[str]]
         List of column names for the DataFrame.
+        If an entry is a list of names, the (mapped) field value is expected
+        to be a sequence and is spread over those columns.
     fields : list[str]
         List of fields to extract from the JSON records.
         If a field is a list, it will be treated as a path to nested fields.
@@ -24,6 +200,16 @@ def json_data_extraction(file_path: str,
         Optional dictionnary of functions to apply to specific fields.
         The keys are field names and the values are functions to apply.
         If a field is a list, str(field) will be used as the key.
+    line_filters : dict|None
+        Optional dictionnary of (needles, default) pairs keyed like maps.
+        When none of the needles (bytes) appear in the raw line, the field
+        is not extracted or mapped and the default value is used instead:
+        C-speed substring tests replace the per-record Python work.
+        Ignored on the maps-free fast path.
+    sort : bool
+        Whether to sort the data by the first column.
+        Callers that re-sort the result anyway should pass False.
+        Default: True.
     save : bool
         Whether to save the processed data to a CSV file.
         Default: False.
@@ -33,35 +219,74 @@ def json_data_extraction(file_path: str,
     pd.DataFrame
         A DataFrame containing the processed data.
     """
-    data = []
-    with open(file_path, "r") as file:
-        for line in file:
-            record = json.loads(line.strip())
-            row = []
-            if 'count' in record:
-                assert record['count'] == len(data), "Mismatch in data count"
-                continue
-            for field in fields:
-                if isinstance(field, list):
-                    nested_value = record
-                    for subfield in field:
-                        nested_value = nested_value[subfield]
-                    value = nested_value
-                else:
-                    value = record[field]
-                if maps and str(field) in maps:
-                    value = maps[str(field)](value)
-                row.append(value)
-            data.append(row)
-    
-    df = pd.DataFrame(data, columns=columns).sort_values(by=columns[0])
-    df.reset_index(drop=True, inplace=True)
+    if maps is None:
+        # no per-record transform needed: let pandas' C parser read the whole
+        # file and extract nested fields column-wise afterwards
+        raw = pd.read_json(file_path, lines=True)
+        if 'count' in raw.columns:
+            counts = raw['count'].dropna()
+            raw = raw[raw['count'].isna()]
+            assert (counts == len(raw)).all(), "Mismatch in data count"
+        cols = {}
+        for column, field in zip(columns, fields):
+            if isinstance(field, list):
+                values = raw[field[0]]
+                for subfield in field[1:]:
+                    values = values.map(itemgetter(subfield))
+            else:
+                values = raw[field]
+            cols[column] = values
+        df = pd.DataFrame(cols)
+        # a monotonic key means the data is already sorted: skip the O(N log N) pass
+        if sort and not df[columns[0]].is_monotonic_increasing:
+            df = df.sort_values(by=columns[0])
+        df.reset_index(drop=True, inplace=True)
+
+        # only rewrite the CSV when the source JSON is newer than the copy on disk
+        if save and (not isfile(name := file_path.replace('.json', '.csv'))
+                     or getmtime(name) < getmtime(file_path)):
+            _write_csv(df, name)
+            print(f"Saved processed data to {name}")
+
+        return df
+
+    workers = cpu_count() or 1
+    if workers > 1 and getsize(file_path) >= PARALLEL_MIN_FILE_SIZE:
+        # parsing is CPU-bound, so spread newline-aligned byte ranges of the
+        # file over all cores; workers mmap the file and parse their slice
+        ranges = _chunk_offsets(file_path, workers)
+        with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+            results = list(executor.map(_parse_chunk, repeat(file_path),
+                                        *zip(*ranges),
+                                        repeat(columns), repeat(fields), repeat(maps),
+                                        repeat(line_filters)))
+    else:
+        with open(file_path, "rb") as file:
+            results = [_parse_lines(file.read().splitlines(), columns, fields, maps, line_filters)]
+
+    names = _flatten_columns(columns)
+    cols = {name: [] for name in names}
+    expected_count = None
+    for chunk_cols, chunk_count in results:
+        for name in names:
+            cols[name].extend(chunk_cols[name])
+        if chunk_count is not None:
+            expected_count = chunk_count
+    if expected_count is not None:
+        assert expected_count == len(cols[names[0]]), "Mismatch in data count"
+
+    df = pd.DataFrame(cols, copy=False)
+    # a monotonic key means the data is already sorted: skip the O(N log N) pass
+    if sort and not df[names[0]].is_monotonic_increasing:
+        df = df.sort_values(by=names[0])
+        df.reset_index(drop=True, inplace=True)
     
-    if save:
-        name = file_path.replace('.json', '.csv')
-        df.copy().to_csv(name, index=False)
+    # only rewrite the CSV when the source JSON is newer than the copy on disk
+    if save and (not isfile(name := file_path.replace('.json', '.csv'))
+                 or getmtime(name) < getmtime(file_path)):
+        _write_csv(df, name)
         print(f"Saved processed data to {name}")
-        
+
     return df
 
 
@@ -82,22 +307,78 @@ def transform_probes_history(probes: Probes, save: bool=False) -> pd.DataFrame:
         A DataFrame containing the processed probes history.
     """
     file_path = PROBES_HISTORY_FILE(probes)
+    cache_path = PROBES_HISTORY_FILE(probes, ext='parquet')
+    # reuse the saved transform when it is at least as recent as the raw data
+    if isfile(cache_path) and (not isfile(file_path) or getmtime(cache_path) >= getmtime(file_path)):
+        return pd.read_parquet(cache_path)
     if not isfile(file_path):
         start_time, end_time = get_time_range(MEASUREMENT_ID)
         download_probes_history(probes, start_time, end_time)
     columns = ['probe_id', 'ip_address', 'asn', 'status', 'since']
     fields = ['id', 'address_v4', 'asn_v4', ['status', 'name'], ['status', 'since']]
     
-    df = json_data_extraction(file_path, columns, fields, save=save)
-    
-    return df.astype({
-        'probe_id': str,
-        'ip_address': str,
+    df = json_data_extraction(file_path, columns, fields, save=False)
+
+    # low-cardinality columns become categories: comparisons run on the
+    # small integer codes instead of per-row string equality
+    df = df.astype({
+        'probe_id': int, # same dtype as the PROBES keys, and a cheaper groupby key than str
+        'ip_address': 'category',
         'asn': int,
-        'status': str,
+        'status': 'category',
         'since': int
     })
 
+    if save:
+        name = PROBES_HISTORY_FILE(probes, ext='parquet')
+        df.to_parquet(name, compression='zstd', index=False)
+        print(f"Saved processed data to {name}")
+
+    return df
+
+
+def process_result(result: dict) -> list[float|str|None]:
+    """
+    Get the bent pipe latency from the result.
+    Defined at module level so it can be pickled to parser worker processes.
+
+    Parameters
+    ----------
+    result : dict
+        The result field from the measurement.
+
+    Returns
+    -------
+    list[float|str|None]
+        The mean user, bent pipe and ground latencies in milliseconds,
+        followed by an error message (None when the traceroute is usable).
+        Latencies that cannot be computed are NaN, keeping the columns numeric.
+    """
+    user = 0
+    bent_pipe = 0
+    ground = 0
+    last_rtt = 0 # to get user latency (hop before starlink gateway)
+    gateway = STARLINK_GATEWAY # local alias, avoids a global lookup per hop
+    last_hop = len(result)
+    for hop in result:
+        error = hop.get('error')
+        if error is not None:
+            return [nan, nan, nan, f"Error: {error}"]
+        packets = hop['result']
+        # packets without an rtt (timeouts) count as 0, as before
+        mean_rtt = sum(pkt.get('rtt', 0) for pkt in packets) / len(packets)
+        if packets[0].get('from') == gateway:
+            user = last_rtt
+            bent_pipe = mean_rtt - user
+        elif hop['hop'] == last_hop:
+            ground = mean_rtt - user - bent_pipe
+        last_rtt = mean_rtt
+
+    if bent_pipe == 0:
+        return [user, nan, ground, "Startlink gateway not in the path"]
+
+    return [round(user, 2), round(bent_pipe, 2), round(ground, 2), None]
+
 
 def transform_measurement(measurement_id: int, save: bool=False) -> pd.DataFrame:
     """
@@ -116,76 +397,52 @@ def transform_measurement(measurement_id: int, save: bool=False) -> pd.DataFrame
         A DataFrame containing the processed measurements.
     """
     file_path = MEASUREMENT_FILE(measurement_id)
+    cache_path = MEASUREMENT_FILE(measurement_id, ext='parquet')
+    # reuse the saved transform when it is at least as recent as the raw data
+    if isfile(cache_path) and (not isfile(file_path) or getmtime(cache_path) >= getmtime(file_path)):
+        return pd.read_parquet(cache_path)
     if not isfile(file_path):
         download_measurement(measurement_id)
-    columns = ['probe_id', 'timestamp', 'bent_pipe_latency']
+    # process_result yields the 3 latencies and the error, emitted as 4 columns directly
+    columns = ['probe_id', 'timestamp', ['user_latency', 'bent_pipe_latency', 'ground_latency', 'error']]
     fields = ['prb_id', 'timestamp', 'result']
-    
-    def process_result(result: dict) -> list[float|str]:
-        """
-        Get the bent pipe latency from the result.
-        
-        Parameters
-        ----------
-        result : dict
-            The result field from the measurement.
-        
-        Returns
-        -------
-        float | str
-            The mean bent pipe latency in milliseconds, or an error message if not available.
-        """
-        user = 0
-        bent_pipe = 0
-        ground = 0
-        last_rtt = 0 # to get user latency (hop before starlink gateway)
-        for hop in result:
-            if 'error' in hop:
-                return [f"Error: {hop['error']}"] * 3 
-            mean_rtt = 0
-            for pkt in hop['result']:
-                if 'rtt' in pkt:
-                    mean_rtt += pkt['rtt']
-            mean_rtt /= len(hop['result'])
-            if 'from' in hop['result'][0] and hop['result'][0]['from'] == STARLINK_GATEWAY:
-                user = last_rtt
-                bent_pipe = mean_rtt - user
-            elif hop['hop'] == len(result):
-                ground = mean_rtt - user - bent_pipe
-            last_rtt = mean_rtt
-        
-        if bent_pipe == 0:
-            return [user, "Startlink gateway not in the path", ground]
-            
-        return [round(user, 2), round(bent_pipe, 2), round(ground, 2)]
 
     maps = {'result': process_result}
-    
-    df = json_data_extraction(file_path, columns, fields, maps=maps, save=False)
-    
-    # Convert list of latencies to separate columns
-    df[['user_latency', 'bent_pipe_latency', 'ground_latency']] = pd.DataFrame(df['bent_pipe_latency'].tolist(), index=df.index)
-    
-    # Add countryuser and continent information
-    df['country'] = df['probe_id'].map(lambda x: PROBES[x][0])
-    df['continent'] = df['probe_id'].map(lambda x: PROBES[x][1])
-    df = df[['continent', 'country', 'probe_id', 'timestamp', 'user_latency', 'bent_pipe_latency', 'ground_latency']]
+    # a traceroute without the gateway address anywhere in its raw bytes
+    # cannot traverse it: skip its hop loop with substring tests instead
+    # (error-carrying lines are still parsed to keep the specific message)
+    line_filters = {'result': ((STARLINK_GATEWAY.encode(), b'"error"'),
+                               [nan, nan, nan, "Startlink gateway not in the path"])}
+
+    # no need to pre-sort: the frame is re-sorted by location below
+    df = json_data_extraction(file_path, columns, fields, maps=maps,
+                              line_filters=line_filters, sort=False, save=False)
+
+    # Add country and continent information
+    df = df.join(PROBES_DF, on='probe_id')
+    df = df[['continent', 'country', 'probe_id', 'timestamp', 'user_latency', 'bent_pipe_latency', 'ground_latency', 'error']]
     df.sort_values(by=['continent', 'country', 'probe_id', 'timestamp'], inplace=True)
-    
+
+    # narrow dtypes: 32-bit numbers and category codes halve the bytes every
+    # later groupby and plot has to move; errors live in their own column so
+    # the latencies stay numeric (NaN when unavailable)
+    df = df.astype({
+        'continent': 'category',
+        'country': 'category',
+        'probe_id': 'int32',
+        'timestamp': 'int32', # Unix seconds fit until 2038
+        'user_latency': 'float32',
+        'bent_pipe_latency': 'float32',
+        'ground_latency': 'float32',
+        'error': 'category'
+        })
+
     if save:
-        name = MEASUREMENT_FILE(measurement_id, ext='csv')
-        df.copy().to_csv(name, index=False)
+        name = MEASUREMENT_FILE(measurement_id, ext='parquet')
+        df.to_parquet(name, compression='zstd', index=False)
         print(f"Saved processed data to {name}")
-    
-    return df.astype({
-        'continent': str, 
-        'country': str,
-        'probe_id': int, 
-        'timestamp': int,
-        'user_latency': str, # because it can be an error message
-        'bent_pipe_latency': str,
-        'ground_latency': str
-        })
+
+    return df
     
             
 if __name__ == "__main__":
@@ -43,11 +43,7 @@ if __name__ == "__main__":
     
     if PLOT_INDIVIDUAL_PROBES:
         print("Plotting individual probe bent pipe latency...")
-        for id in PROBES:
-            p = {id: PROBES[id]}
-            plot_bent_pipe_latency(bent_pipe_analysis_df, probes=p, save=SAVE_PLOTS, show=SHOW_PLOTS)
-            plot_bent_pipe_histogram(bent_pipe_analysis_df, probes=p, save=SAVE_PLOTS, show=SHOW_PLOTS)
-            plot_bent_pipe_cdf(bent_pipe_analysis_df, probes=p, save=SAVE_PLOTS, show=SHOW_PLOTS)
+        plot_individual_probes(bent_pipe_analysis_df, save=SAVE_PLOTS, show=SHOW_PLOTS)
          
     print("All analyses completed.")
     if SAVE_PLOTS: